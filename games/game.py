@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Protocol
 
 """
 @classmethod has access to the class and can access or modify class state.
@@ -65,3 +65,17 @@ class GameState(ABC):
         static method of the GameState.
         """
         return "P2" if turn == "P1" else "P1"
+
+
+class Tablebase(Protocol):
+    """
+    structural type for a table of solved game states, used by MCTS to cut selection and rollouts short.
+    any object with a matching lookup method is a Tablebase, it does not need to inherit from this class.
+    """
+
+    def lookup(self, state: GameState) -> Optional[Tuple[str, float]]:
+        """
+        returns the exact result of the game from this state, in the same format as GameState.get_result
+        returns None if the state is not solved
+        """
+        ...
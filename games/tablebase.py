@@ -0,0 +1,272 @@
+import os
+import numpy as np
+from itertools import combinations
+from math import comb
+from typing import List, Optional, Tuple
+
+from .game import GameState
+from .tictactoe import TicTacToeGameState
+
+
+class TicTacToeTablebase:
+    """
+    Endgame tablebase for TicTacToe, solved exactly by retrograde analysis.
+
+    Stores the game theoretic outcome of every position with at most max_empty empty squares.
+    Since Player 1 always starts first, the number of X's (and so whose turn it is) is fixed by the number of empty squares.
+    A position is then fully described by which squares are empty, and which of the filled squares hold an X.
+    Both of these are ranked with the combinatorial number system, giving a perfect (and minimal) hash of the position.
+
+    The table is a flat int8 numpy array, so it can be saved to disk and memory-mapped back in with load.
+    Saved tables carry a small header with the build parameters, so a table can never be loaded for the wrong game.
+    """
+
+    # values stored in the table
+    UNKNOWN = 0
+    P1_WIN = 1
+    P2_WIN = 2
+    DRAW = 3
+
+    # maps the stored value to a result, in the same format as GameState.get_result
+    V2R = {P1_WIN: ("P1", 1), P2_WIN: ("P2", 1), DRAW: ("Draw", 0.5)}
+    # maps an outcome string to the stored value
+    O2V = {"P1": P1_WIN, "P2": P2_WIN, "Draw": DRAW}
+
+    # saved tables start with this marker, followed by the build parameters (board_size, win, max_empty) as int32
+    MAGIC = b"TTTBASE1"
+    HEADER_SIZE = len(MAGIC) + 3 * 4
+
+    def __init__(self, table: np.ndarray, board_size: int, win: int, max_empty: int):
+        """
+        Wraps an existing table. Use build to solve a new table, or load to read one from disk.
+
+        Args:
+            table (np.ndarray): flat int8 array of outcomes, indexed by the position hash
+            board_size (int): width/height of the board
+            win (int): the number of patches needed to win
+            max_empty (int): positions with at most this many empty squares are stored in the table
+        """
+        self.board_size = board_size
+        self.win = win
+        self.num_cells = board_size * board_size
+        if not 0 <= max_empty <= self.num_cells:
+            raise ValueError(
+                "max_empty must be between 0 and {0}".format(self.num_cells)
+            )
+        self.max_empty = max_empty
+
+        # flattened indices of every row, column and diagonal of length win
+        # checking these directly is much cheaper than building a GameState for every position while solving
+        self.lines = []
+        for x in range(board_size):
+            for y in range(board_size):
+                for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+                    end_x, end_y = x + dx * (win - 1), y + dy * (win - 1)
+                    if 0 <= end_x < board_size and 0 <= end_y < board_size:
+                        self.lines.append(
+                            [
+                                (x + dx * i) * board_size + (y + dy * i)
+                                for i in range(win)
+                            ]
+                        )
+
+        # offsets[k] is where the block of positions with k empty squares starts
+        self.offsets = self._offsets(self.num_cells, max_empty)
+
+        if table.dtype != np.int8:
+            raise ValueError("table has dtype {0}, expected int8".format(table.dtype))
+        if table.shape != (self.offsets[-1],):
+            raise ValueError(
+                "table has shape {0}, expected ({1},)".format(
+                    table.shape, self.offsets[-1]
+                )
+            )
+        self.table = table
+
+    @staticmethod
+    def _num_x(num_cells: int, num_empty: int) -> int:
+        """number of X's on the board when there are num_empty empty squares, as P1 always starts"""
+        return (num_cells - num_empty + 1) // 2
+
+    @staticmethod
+    def _offsets(num_cells: int, max_empty: int) -> List[int]:
+        """
+        start of the block of positions with k empty squares, for each k up to max_empty.
+        the last entry is the total size of the table.
+        """
+        offsets = [0]
+        for k in range(max_empty + 1):
+            num_x = TicTacToeTablebase._num_x(num_cells, k)
+            offsets.append(
+                offsets[-1] + comb(num_cells, k) * comb(num_cells - k, num_x)
+            )
+        return offsets
+
+    @staticmethod
+    def _rank(positions: List[int]) -> int:
+        """
+        ranks a sorted combination with the combinatorial number system.
+        this is a bijection from the combinations of k out of n items onto 0..comb(n, k)-1
+        """
+        return sum(comb(c, i + 1) for i, c in enumerate(positions))
+
+    def _index(self, cells: List[int]) -> Optional[int]:
+        """
+        perfect hash of a flattened board, given as a list of cell values (1, -1, 0).
+        returns None if the position is not stored in the table.
+        """
+        empty = []
+        x_in_filled = []
+        num_filled = 0
+        for i, v in enumerate(cells):
+            if v == 0:
+                empty.append(i)
+            else:
+                # position of this X among the filled squares only
+                if v == 1:
+                    x_in_filled.append(num_filled)
+                num_filled += 1
+
+        num_empty = len(empty)
+        if num_empty > self.max_empty:
+            return None
+        if len(x_in_filled) != self._num_x(self.num_cells, num_empty):
+            return None
+
+        num_filled = self.num_cells - num_empty
+        x_combs = comb(num_filled, len(x_in_filled))
+        return (
+            self.offsets[num_empty]
+            + self._rank(empty) * x_combs
+            + self._rank(x_in_filled)
+        )
+
+    def lookup(self, state: GameState) -> Optional[Tuple[str, float]]:
+        """
+        returns the exact result of the game from this state under perfect play, like ("P1",1)
+        returns None if the state is not solved in this table
+        """
+        if not isinstance(state, TicTacToeGameState):
+            return None
+        if state.board_size != self.board_size or state.win != self.win:
+            return None
+        # cheap check before hashing the whole board
+        if np.count_nonzero(state.board == 0) > self.max_empty:
+            return None
+
+        index = self._index([int(v) for v in state.board.flat])
+        if index is None:
+            return None
+        value = int(self.table[index])
+        # the stored turn is implied by the board, make sure it matches the state
+        if value == self.UNKNOWN or state.get_turn() != (
+            "P1" if np.sum(state.board) == 0 else "P2"
+        ):
+            return None
+        return self.V2R[value]
+
+    @classmethod
+    def build(cls, board_size: int, win: int, max_empty: int) -> "TicTacToeTablebase":
+        """
+        Solves all positions with at most max_empty empty squares by retrograde analysis.
+
+        Positions are solved layer by layer, starting from full boards.
+        Every move fills one square, so all children of a position with k empty squares live in layer k-1, which is already solved.
+
+        Args:
+            board_size (int): width/height of the board
+            win (int): the number of patches needed to win
+            max_empty (int): solve all positions with at most this many empty squares
+
+        Returns:
+            TicTacToeTablebase: the solved tablebase
+        """
+        # work out the size of the table first, then fill it in
+        size = cls._offsets(board_size * board_size, max_empty)[-1]
+        tablebase = cls(np.zeros(size, dtype=np.int8), board_size, win, max_empty)
+        for num_empty in range(max_empty + 1):
+            tablebase._solve_layer(num_empty)
+        return tablebase
+
+    def _terminal_value(self, cells: List[int]) -> int:
+        """same as TicTacToeGameState.get_result, but on a flattened board. returns UNKNOWN if the game isnt over"""
+        for line in self.lines:
+            line_sum = sum(cells[i] for i in line)
+            if line_sum == self.win:
+                return self.P1_WIN
+            if line_sum == -self.win:
+                return self.P2_WIN
+        if 0 not in cells:
+            return self.DRAW
+        return self.UNKNOWN
+
+    def _solve_layer(self, num_empty: int):
+        """solves every position with exactly num_empty empty squares, assuming the layer below is solved"""
+        num_filled = self.num_cells - num_empty
+        num_x = self._num_x(self.num_cells, num_empty)
+        turn = "P1" if num_x * 2 == num_filled else "P2"
+        mover = TicTacToeGameState.P2V[turn]
+        # best to worst outcome, from the perspective of the player to move
+        preference = [
+            self.O2V[turn],
+            self.DRAW,
+            self.O2V[TicTacToeGameState.other(turn)],
+        ]
+
+        for empty in combinations(range(self.num_cells), num_empty):
+            filled = [i for i in range(self.num_cells) if i not in empty]
+            for x_cells in combinations(filled, num_x):
+                cells = [-1] * self.num_cells
+                for i in empty:
+                    cells[i] = 0
+                for i in x_cells:
+                    cells[i] = 1
+
+                value = self._terminal_value(cells)
+                if value == self.UNKNOWN:
+                    # the best outcome the player to move can reach, over all children
+                    child_values = set()
+                    for i in empty:
+                        cells[i] = mover
+                        child_values.add(int(self.table[self._index(cells)]))
+                        cells[i] = 0
+                    value = next(v for v in preference if v in child_values)
+
+                self.table[self._index(cells)] = value
+
+    def save(self, path: str):
+        """
+        saves the table to disk, as a header with the build parameters followed by the raw int8 table.
+        this can be memory-mapped back in by load.
+        """
+        params = np.array([self.board_size, self.win, self.max_empty], dtype="<i4")
+        with open(path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(params.tobytes())
+            f.write(np.asarray(self.table, dtype=np.int8).tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "TicTacToeTablebase":
+        """
+        loads a table saved by save, memory-mapped read-only so it is not read into memory up front.
+        the board parameters are read from the header of the file.
+        """
+        with open(path, "rb") as f:
+            header = f.read(cls.HEADER_SIZE)
+        if len(header) != cls.HEADER_SIZE or not header.startswith(cls.MAGIC):
+            raise ValueError("{0} is not a saved TicTacToe tablebase".format(path))
+        board_size, win, max_empty = (
+            int(v) for v in np.frombuffer(header[len(cls.MAGIC) :], dtype="<i4")
+        )
+
+        size = cls._offsets(board_size * board_size, max_empty)[-1]
+        if os.path.getsize(path) != cls.HEADER_SIZE + size:
+            raise ValueError(
+                "{0} has the wrong size for a table with board_size={1}, win={2}, max_empty={3}".format(
+                    path, board_size, win, max_empty
+                )
+            )
+        table = np.memmap(
+            path, dtype=np.int8, mode="r", offset=cls.HEADER_SIZE, shape=(size,)
+        )
+        return cls(table, board_size, win, max_empty)
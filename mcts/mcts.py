@@ -2,8 +2,8 @@ import numpy as np
 
 # look in the same directory as current one
 from .node import Node, TwoPlayerNode
-from games.game import Action
-from typing import Tuple
+from games.game import Action, Tablebase
+from typing import Tuple, Optional
 
 
 class MCTS:
@@ -13,10 +13,14 @@ class MCTS:
     All information is stored in the nodes and the relationship between them
 
     Currently ONLY supports 2 player version.
+
+    Optionally takes a Tablebase, any object with a lookup(state) method that returns the exact result of a state like get_result does, or None if the state is not solved.
+    Rollouts stop as soon as they reach a solved state, and use the exact result instead of playing on.
+    Selection stops at a solved state once all of its children are in the game tree.
     """
 
     @staticmethod
-    def _select(root: Node) -> Node:
+    def _select(root: Node, tablebase: Optional[Tablebase] = None) -> Node:
         """
         Selects a leaf node in the whole game tree to do the expansion step.
 
@@ -25,6 +29,7 @@ class MCTS:
 
         Args:
             root (Node): the root node of the game tree, that we want to select one of the leaf nodes in this game tree
+            tablebase (Optional[Tablebase]): optional tablebase of solved states, selection stops at solved states that are fully expanded
 
         Returns:
             Node: The selected leaf node, for rollout
@@ -36,6 +41,11 @@ class MCTS:
             if len(node.unexplored_actions) > 0:
                 # this node will be selected for simulation/rollout
                 return node
+            # NOTE: a solved node is still expanded first (above), one child per iteration, since choose needs children to exploit
+            # in an endgame tablebase the children of a solved node are solved too, so each child's single rollout is already exact
+            # once fully expanded there is no need to go deeper, the result of this node is already known exactly
+            if MCTS._lookup(node, tablebase) is not None:
+                return node
             # all nodes have already been explored, go one level deeper
             else:
                 # descend one layer deeper, with some exploration
@@ -69,21 +79,32 @@ class MCTS:
         return child
 
     @staticmethod
-    def _simulate(node: Node) -> Tuple[str, float]:
+    def _simulate(
+        node: Node, tablebase: Optional[Tablebase] = None
+    ) -> Tuple[str, float]:
         """
         Returns the results for a random simulation (to completion) of the given node
         Only a single round of simulation.
         NOTE: Allows the node to be terminal, in which case the result is immediately returned
+        If a tablebase is given, the simulation stops as soon as it reaches a solved state, and returns the exact result
 
         Args:
             node (Node): the given node to start simulation from
+            tablebase (Optional[Tablebase]): optional tablebase of solved states
 
         Returns:
             Tuple[str, float]: the tuple containing the result of simulation
         """
 
         cur_state = node.state
-        while not cur_state.is_terminal():
+        while True:
+            # check the tablebase first, this also covers terminal states that are in the table
+            if tablebase is not None:
+                result = tablebase.lookup(cur_state)
+                if result is not None:
+                    return result
+            if cur_state.is_terminal():
+                break
             # get all the possible moves
             actions = cur_state.get_legal_actions()
             action = MCTS._rollout_policy(actions)
@@ -117,6 +138,15 @@ class MCTS:
         if node.parent:
             MCTS._backpropagate(node.parent, result)
 
+    @staticmethod
+    def _lookup(
+        node: Node, tablebase: Optional[Tablebase]
+    ) -> Optional[Tuple[str, float]]:
+        """returns the exact result of this node from the tablebase, or None if there is no tablebase or the node is not solved"""
+        if tablebase is None:
+            return None
+        return tablebase.lookup(node.state)
+
     @staticmethod
     def _rollout_policy(actions) -> Action:
         """returns a random action from the available choice of actions"""
@@ -155,7 +185,7 @@ class MCTS:
         return MCTS._UCT(node, c_explore=0)
 
     @staticmethod
-    def train(root: Node):
+    def train(root: Node, tablebase: Optional[Tablebase] = None):
         """
         Does one iteration of Monte Carlo Tree Search with the 4 core steps.
         Essentially adds one more child to the game tree and do backprop on the tree.
@@ -163,22 +193,22 @@ class MCTS:
 
         Args:
             root (Node): the root of the existing game tree
+            tablebase (Optional[Tablebase]): optional tablebase of solved states, to cut selection and rollouts short
         """
 
-        leaf = MCTS._select(root)
+        leaf = MCTS._select(root, tablebase)
 
-        # this node doesnt represent an end state
-        if not leaf.state.is_terminal():
-            # must have unexplored actions, so we can create child Nodes
-            assert len(leaf.unexplored_actions) > 0
+        # this node doesnt represent an end state, and still has unexplored actions
+        # NOTE: a fully explored leaf that is not terminal must be solved in the tablebase
+        if not leaf.state.is_terminal() and len(leaf.unexplored_actions) > 0:
             # new child in the game tree
             child = MCTS._expand(leaf)
             # simulation results from this child
-            result = MCTS._simulate(child)
+            result = MCTS._simulate(child, tablebase)
             # now we backprop the empty child, which currently has no stats/simulation in it
             MCTS._backpropagate(child, result)
-        # the leaf node is in fact terminal
+        # the leaf node is in fact terminal, or solved
         else:
             # no point expanding, get results directly
-            result = MCTS._simulate(leaf)
+            result = MCTS._simulate(leaf, tablebase)
             MCTS._backpropagate(leaf, result)
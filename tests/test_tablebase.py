@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+from itertools import combinations
+from math import comb
+
+from games.tablebase import TicTacToeTablebase
+from games.tictactoe import TicTacToeGameState
+from mcts.mcts import MCTS
+from mcts.node import TwoPlayerNode
+
+
+@pytest.fixture(scope="module")
+def tablebase():
+    """the full 3x3 game, solved"""
+    return TicTacToeTablebase.build(3, 3, 9)
+
+
+def minimax(state: TicTacToeGameState, cache: dict):
+    """brute force oracle, returns the outcome string under perfect play"""
+    key = state.board.tobytes()
+    if key in cache:
+        return cache[key]
+    result = state.get_result()
+    if result is not None:
+        cache[key] = result[0]
+        return result[0]
+    turn = state.get_turn()
+    outcomes = {
+        minimax(state.act(action), cache) for action in state.get_legal_actions()
+    }
+    for outcome in [turn, "Draw", TicTacToeGameState.other(turn)]:
+        if outcome in outcomes:
+            cache[key] = outcome
+            return outcome
+
+
+def random_reachable_state(rng, num_moves: int) -> TicTacToeGameState:
+    """plays random moves from the empty board, stopping early if the game ends"""
+    state = TicTacToeGameState(np.zeros((3, 3)), 3, "P1")
+    for _ in range(num_moves):
+        if state.is_terminal():
+            break
+        actions = state.get_legal_actions()
+        state = state.act(actions[rng.integers(len(actions))])
+    return state
+
+
+def test_index_is_bijection_per_layer(tablebase):
+    num_cells = tablebase.num_cells
+    for num_empty in range(tablebase.max_empty + 1):
+        num_x = (num_cells - num_empty + 1) // 2
+        indices = set()
+        for empty in combinations(range(num_cells), num_empty):
+            filled = [i for i in range(num_cells) if i not in empty]
+            for x_cells in combinations(filled, num_x):
+                cells = [-1] * num_cells
+                for i in empty:
+                    cells[i] = 0
+                for i in x_cells:
+                    cells[i] = 1
+                indices.add(tablebase._index(cells))
+
+        expected = range(tablebase.offsets[num_empty], tablebase.offsets[num_empty + 1])
+        assert len(expected) == comb(num_cells, num_empty) * comb(
+            num_cells - num_empty, num_x
+        )
+        assert indices == set(expected)
+
+
+def test_empty_board_is_draw(tablebase):
+    state = TicTacToeGameState(np.zeros((3, 3)), 3, "P1")
+    assert tablebase.lookup(state) == ("Draw", 0.5)
+
+
+def test_agrees_with_minimax(tablebase):
+    rng = np.random.default_rng(0)
+    cache: dict = {}
+    for _ in range(200):
+        state = random_reachable_state(rng, int(rng.integers(0, 9)))
+        assert tablebase.lookup(state)[0] == minimax(state, cache)
+
+
+def test_lookup_rejects_wrong_turn(tablebase):
+    # it is P1's turn on the empty board
+    state = TicTacToeGameState(np.zeros((3, 3)), 3, "P2")
+    assert tablebase.lookup(state) is None
+
+
+def test_save_load_roundtrip(tablebase, tmp_path):
+    path = str(tmp_path / "ttt.tb")
+    tablebase.save(path)
+    loaded = TicTacToeTablebase.load(path)
+
+    assert isinstance(loaded.table, np.memmap)
+    assert (loaded.board_size, loaded.win, loaded.max_empty) == (3, 3, 9)
+    assert np.array_equal(loaded.table, tablebase.table)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "junk.tb"
+    path.write_bytes(b"not a tablebase")
+    with pytest.raises(ValueError):
+        TicTacToeTablebase.load(str(path))
+
+
+def test_load_uses_saved_win_condition(tmp_path):
+    path = str(tmp_path / "ttt.tb")
+    TicTacToeTablebase.build(4, 3, 0).save(path)
+    loaded = TicTacToeTablebase.load(path)
+
+    assert loaded.win == 3
+    # a full 4x4 board that is a draw with a win condition of 4, but not 3
+    board = np.array(
+        [[1, 1, 1, -1], [-1, -1, -1, 1], [1, 1, 1, -1], [-1, -1, -1, 1]],
+        dtype=float,
+    )
+    assert TicTacToeGameState(board, 4, "P1").get_result() == ("Draw", 0.5)
+    assert loaded.lookup(TicTacToeGameState(board, 3, "P1")) == ("P1", 1)
+    assert loaded.lookup(TicTacToeGameState(board, 4, "P1")) is None
+
+
+def test_rejects_non_int8_table():
+    size = TicTacToeTablebase.build(3, 3, 2).table.shape[0]
+    with pytest.raises(ValueError):
+        TicTacToeTablebase(np.zeros(size, dtype=np.int16), 3, 3, 2)
+
+
+def test_train_stops_at_solved_expanded_node(tablebase):
+    board = np.array([[1, -1, 1], [0, -1, 0], [0, 1, 0]], dtype=float)
+    root = TwoPlayerNode(TicTacToeGameState(board, 3, "P2"), parent=None)
+    num_actions = len(root.unexplored_actions)
+
+    # each iteration expands one child of the root
+    for _ in range(num_actions):
+        MCTS.train(root, tablebase)
+    assert len(root.children) == num_actions
+    for child in root.children:
+        # the single rollout of each child is its exact result
+        outcome, reward = tablebase.lookup(child.state)
+        assert child.visits == 1 and child.stats[outcome] == reward
+
+    # now selection stops at the solved root, and backprops its exact result
+    assert MCTS._select(root, tablebase) is root
+    stats = dict(root.stats)
+    for _ in range(5):
+        MCTS.train(root, tablebase)
+    outcome, reward = tablebase.lookup(root.state)
+    assert root.visits == num_actions + 5
+    assert root.stats[outcome] == stats[outcome] + 5 * reward
+    assert all(child.visits == 1 for child in root.children)